@@ -3,14 +3,21 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import os
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
 from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-from openpyxl.utils import get_column_letter
 
 
 @dataclass
@@ -29,6 +36,31 @@ class AppConfig:
     exit_marker: str
     timestamp_format: Optional[str]
     recursive: bool
+    cache_folder: Optional[Path]
+
+
+# A read workbook (or None when it was skipped) plus messages for stderr;
+# workers return messages so the parent prints them in file order.
+SheetResult = Tuple[Optional[pd.DataFrame], List[str]]
+
+EXCEL_ENGINES: Dict[str, str] = {
+    ".xlsx": "openpyxl",
+    ".xlsm": "openpyxl",
+    ".xlsb": "pyxlsb",
+    ".xls": "xlrd",
+}
+
+AUTOSIZE_SAMPLE_ROWS = 5_000
+
+FORMAT_SCAN_ROWS = 10_000
+FORMAT_SAMPLE_SIZE = 500
+
+TIMESTAMP_FORMATS: Tuple[str, ...] = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%m/%d/%Y %H:%M",
+)
 
 
 def parse_args() -> argparse.Namespace:
@@ -60,6 +92,11 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Recursively search for Excel files inside the source folder",
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-read every Excel file instead of using cached Parquet copies",
+    )
     return parser.parse_args()
 
 
@@ -101,6 +138,10 @@ def normalize_config(raw_cfg: Dict, overrides: argparse.Namespace, config_base:
     exit_marker = (raw_cfg.get("exit_marker") or "02 EXIT").upper()
     timestamp_format = overrides.timestamp_format or raw_cfg.get("timestamp_format")
     recursive = overrides.recursive or raw_cfg.get("recursive", False)
+    cache_setting = raw_cfg.get("cache_folder", "output/cache")
+    cache_folder = (
+        None if overrides.no_cache or not cache_setting else _resolve_path(cache_setting)
+    )
 
     return AppConfig(
         source_folder=source_folder,
@@ -110,145 +151,386 @@ def normalize_config(raw_cfg: Dict, overrides: argparse.Namespace, config_base:
         exit_marker=exit_marker,
         timestamp_format=timestamp_format,
         recursive=recursive,
+        cache_folder=cache_folder,
     )
 
 
 def discover_excel_files(folder: Path, recursive: bool) -> List[Path]:
-    pattern = "**/*.xls*" if recursive else "*.xls*"
-    files = [
-        file_path
-        for file_path in folder.glob(pattern)
-        if file_path.is_file() and not file_path.name.startswith("~$")
-    ]
+    if not folder.is_dir():
+        return []
+    extensions = tuple(EXCEL_ENGINES)
+    found: List[str] = []
+    pending = deque([str(folder)])
+    while pending:
+        directory = pending.popleft()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # DirEntry caches the type information from the directory scan,
+                    # so these checks do not stat every entry.
+                    if recursive and entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif (
+                        entry.name.lower().endswith(extensions)
+                        and not entry.name.startswith("~$")
+                        and entry.is_file()
+                    ):
+                        found.append(entry.path)
+        except OSError:
+            # Unreadable sub-folders are skipped, as Path.glob did.
+            continue
+    files = [Path(file_path) for file_path in found]
     files.sort()
     return files
 
 
+def _open_workbook(file_path: Path) -> pd.ExcelFile:
+    engine = EXCEL_ENGINES.get(file_path.suffix.lower())
+    engine_kwargs = {"read_only": True, "data_only": True} if engine == "openpyxl" else None
+    return pd.ExcelFile(file_path, engine=engine, engine_kwargs=engine_kwargs)
+
+
+def _read_events_sheet(file_path: Path, columns: ColumnMapping) -> SheetResult:
+    required = [columns.plate, columns.event, columns.timestamp]
+    with _open_workbook(file_path) as workbook:
+        # Inspect the header row first so files without the expected columns
+        # are rejected without parsing the whole sheet.
+        header = workbook.parse(nrows=0).columns
+        missing = set(required) - set(header)
+        if missing:
+            return None, [f"[SKIP] {file_path} missing required columns: {sorted(missing)}"]
+        frame = workbook.parse(
+            usecols=required,
+            dtype={columns.plate: "string", columns.event: "string"},
+        )
+
+    # The parsed frame is already limited to the required columns, so trim it
+    # in place instead of copying it again. usecols keeps the sheet's column
+    # order, hence the rename by name and the reorder only when needed.
+    frame.dropna(subset=[columns.plate], inplace=True)
+    frame.rename(
+        columns={
+            columns.plate: "plate",
+            columns.event: "event",
+            columns.timestamp: "timestamp",
+        },
+        inplace=True,
+    )
+    if list(frame.columns) != ["plate", "event", "timestamp"]:
+        frame = frame[["plate", "event", "timestamp"]]
+    return frame, []
+
+
+def _cache_file(cache_folder: Path, file_path: Path) -> Path:
+    # One entry per workbook path, overwritten whenever the workbook changes,
+    # so the cache folder does not grow with every re-export.
+    key = str(file_path.resolve())
+    return cache_folder / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()}.parquet"
+
+
+def _cache_stamp(file_path: Path, columns: ColumnMapping) -> Dict[str, object]:
+    stat = file_path.stat()
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "columns": [columns.plate, columns.event, columns.timestamp],
+    }
+
+
+def _to_cache(trimmed: pd.DataFrame) -> Optional[pd.DataFrame]:
+    if trimmed["timestamp"].dtype != object:
+        return trimmed
+    # Sheets mixing date cells and text timestamps yield an object column that
+    # Parquet cannot store, so keep both kinds side by side. Columns holding
+    # anything else (e.g. numeric cells) are not cached at all, since turning
+    # them into text would change how they parse.
+    raw = trimmed["timestamp"]
+    is_datetime = raw.map(lambda value: isinstance(value, datetime)).astype(bool)
+    is_text = raw.map(lambda value: isinstance(value, str)).astype(bool)
+    if not (is_datetime | is_text | raw.isna()).all():
+        return None
+    return trimmed.drop(columns="timestamp").assign(
+        timestamp_value=pd.to_datetime(raw.where(is_datetime), errors="coerce"),
+        timestamp_text=raw.where(is_text).astype("string"),
+    )
+
+
+def _from_cache(cached: pd.DataFrame) -> pd.DataFrame:
+    if "timestamp" in cached.columns:
+        return cached
+    values = cached["timestamp_value"].astype(object)
+    texts = cached["timestamp_text"].astype(object)
+    timestamps = values.where(cached["timestamp_value"].notna(), texts)
+    # Empty cells come back as NaN, as read_excel returns them.
+    timestamps = timestamps.where(timestamps.notna(), np.nan)
+    return cached.drop(columns=["timestamp_value", "timestamp_text"]).assign(
+        timestamp=timestamps
+    )
+
+
+def _load_cached_events(
+    file_path: Path,
+    columns: ColumnMapping,
+    cache_folder: Optional[Path],
+) -> SheetResult:
+    # Cheap enough to run in the main process: a hit never needs a worker.
+    if cache_folder is None:
+        return None, []
+    cache_file = _cache_file(cache_folder, file_path)
+    try:
+        stamp = _cache_stamp(file_path, columns)
+        if not cache_file.exists():
+            return None, []
+        cached = pd.read_parquet(cache_file)
+    except Exception as exc:  # pragma: no cover - user feedback
+        return None, [f"[CACHE] Ignoring unreadable cache {cache_file}: {exc}"]
+    # The stamp travels in the Parquet metadata through DataFrame.attrs.
+    if cached.attrs.pop("source", None) != stamp:
+        return None, []
+    return _from_cache(cached), []
+
+
+def _read_events_cached(
+    file_path: Path,
+    columns: ColumnMapping,
+    cache_folder: Optional[Path],
+) -> SheetResult:
+    trimmed, messages = _read_events_sheet(file_path, columns)
+    if trimmed is None or cache_folder is None:
+        return trimmed, messages
+    cacheable = _to_cache(trimmed)
+    if cacheable is None:
+        return trimmed, messages
+    try:
+        cache_folder.mkdir(parents=True, exist_ok=True)
+        cacheable = cacheable.copy(deep=False)
+        cacheable.attrs["source"] = _cache_stamp(file_path, columns)
+        cacheable.to_parquet(_cache_file(cache_folder, file_path), compression="zstd")
+    except Exception as exc:  # pragma: no cover - user feedback
+        messages.append(f"[CACHE] Could not cache {file_path}: {exc}")
+    return trimmed, messages
+
+
+def _infer_timestamp_format(raw: pd.Series) -> Optional[str]:
+    # Only a bounded head of the column is inspected, and a layout is used
+    # only when it is the single candidate that fits every sampled value.
+    # Ambiguous day/month samples fall back to pandas' own inference.
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        return None
+    head = raw.head(FORMAT_SCAN_ROWS)
+    is_text = head.map(lambda value: isinstance(value, str)).astype(bool)
+    texts = head[is_text].astype(str)
+    samples = pd.Series(texts[texts.str.strip() != ""].unique()[:FORMAT_SAMPLE_SIZE])
+    if samples.empty:
+        return None
+    fitting = [
+        candidate
+        for candidate in TIMESTAMP_FORMATS
+        if pd.to_datetime(samples, format=candidate, errors="coerce").notna().all()
+    ]
+    return fitting[0] if len(fitting) == 1 else None
+
+
+def _parse_timestamps(raw: pd.Series, timestamp_format: Optional[str]) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(raw):
+        # Workbooks with real date cells are already parsed by the reader.
+        return raw
+    if timestamp_format is not None and timestamp_format != "mixed":
+        # A fixed format runs through the vectorized strptime path, where
+        # deduplicating first costs more than it saves.
+        return pd.to_datetime(raw, format=timestamp_format, errors="coerce", cache=False)
+    # Camera exports repeat the same timestamp for many rows, so parse each
+    # distinct value once and map the results back onto the column.
+    codes, unique_values = pd.factorize(raw)
+    parsed = pd.to_datetime(unique_values, format=timestamp_format, errors="coerce")
+    return pd.Series(
+        parsed.take(codes, allow_fill=True, fill_value=pd.NaT),
+        index=raw.index,
+        name=raw.name,
+    )
+
+
+def _normalize_labels(raw: pd.Series) -> pd.Series:
+    # Few distinct plates and events repeat across many rows: strip/upper each
+    # distinct value once and return a categorical so later comparisons and
+    # sorts work on integer codes.
+    codes, unique_values = pd.factorize(raw)
+    normalized = [str(value).strip().upper() for value in unique_values]
+    label_codes, categories = pd.factorize(pd.Index(normalized, dtype=object), sort=True)
+    # Missing values carry code -1, which picks the appended -1 sentinel.
+    merged_codes = np.append(label_codes, -1)[codes]
+    return pd.Series(
+        pd.Categorical.from_codes(merged_codes, categories=categories),
+        index=raw.index,
+        name=raw.name,
+    )
+
+
 def load_events(
     files: Iterable[Path],
     columns: ColumnMapping,
     timestamp_format: Optional[str],
+    cache_folder: Optional[Path] = None,
 ) -> pd.DataFrame:
+    file_list = list(files)
     frames: List[pd.DataFrame] = []
-    for file_path in files:
-        try:
-            frame = pd.read_excel(file_path)
-        except Exception as exc:  # pragma: no cover - user feedback
-            print(f"[SKIP] Failed to read {file_path}: {exc}", file=sys.stderr)
-            continue
-
-        missing = {
-            columns.plate,
-            columns.event,
-            columns.timestamp,
-        } - set(frame.columns)
-        if missing:
-            print(
-                f"[SKIP] {file_path} missing required columns: {sorted(missing)}",
-                file=sys.stderr,
+    lookups = [_load_cached_events(file_path, columns, cache_folder) for file_path in file_list]
+    misses = [file_path for file_path, (cached, _) in zip(file_list, lookups) if cached is None]
+    with ExitStack() as stack:
+        reads: Dict[Path, Callable[[], SheetResult]]
+        if len(misses) > 1:
+            # Workbooks are parsed independently, so spread the cache misses
+            # across processes. Results and their messages are still consumed
+            # in file order to keep the output stable.
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=min(len(misses), os.cpu_count() or 1))
             )
-            continue
-
-        trimmed = frame[[columns.plate, columns.event, columns.timestamp]].copy()
-        trimmed = trimmed.dropna(subset=[columns.plate])
-        trimmed.columns = ["plate", "event", "timestamp"]
-        frames.append(trimmed)
-        print(f"[LOAD] {file_path}: {len(trimmed)} rows")
+            reads = {
+                file_path: executor.submit(
+                    _read_events_cached, file_path, columns, cache_folder
+                ).result
+                for file_path in misses
+            }
+        else:
+            # A single workbook gains nothing from a worker process start-up.
+            reads = {
+                file_path: partial(_read_events_cached, file_path, columns, cache_folder)
+                for file_path in misses
+            }
+        for file_path, (trimmed, messages) in zip(file_list, lookups):
+            if trimmed is None:
+                try:
+                    trimmed, read_messages = reads[file_path]()
+                except Exception as exc:  # pragma: no cover - user feedback
+                    messages = messages + [f"[SKIP] Failed to read {file_path}: {exc}"]
+                    trimmed, read_messages = None, []
+                messages = messages + read_messages
+            for message in messages:
+                print(message, file=sys.stderr)
+            if trimmed is None:
+                continue
+
+            frames.append(trimmed)
+            print(f"[LOAD] {file_path}: {len(trimmed)} rows")
 
     if not frames:
         return pd.DataFrame(columns=["plate", "event", "timestamp"])
 
     events = pd.concat(frames, ignore_index=True)
-    events["timestamp"] = pd.to_datetime(
-        events["timestamp"],
-        format=timestamp_format,
-        errors="coerce",
-    )
-    events = events.dropna(subset=["timestamp"]).copy()
-    events["plate"] = events["plate"].astype(str).str.strip().str.upper()
-    events["event"] = events["event"].astype(str).str.strip().str.upper()
-    events = events[(events["plate"] != "") & (events["plate"] != "NAN")]
+    if timestamp_format is None:
+        timestamp_format = _infer_timestamp_format(events["timestamp"])
+    events["timestamp"] = _parse_timestamps(events["timestamp"], timestamp_format)
+    events.dropna(subset=["timestamp"], inplace=True)
+    events["plate"] = _normalize_labels(events["plate"])
+    events["event"] = _normalize_labels(events["event"])
+    # Drop blank, "nan" and missing plates with one membership test on the
+    # categorical codes; missing values and absent placeholders are both -1.
+    plate_codes = events["plate"].cat.codes.to_numpy()
+    placeholder_codes = events["plate"].cat.categories.get_indexer(["", "NAN"])
+    events = events[~np.isin(plate_codes, np.append(placeholder_codes, -1))]
     return events
 
 
+def _run_starts(*keys: np.ndarray) -> np.ndarray:
+    # Offsets where any of the (already sorted) key arrays changes value.
+    size = len(keys[0])
+    changed = np.zeros(size, dtype=bool)
+    if size:
+        changed[0] = True
+    for key in keys:
+        changed[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(changed)
+
+
+def _category_mask(values: pd.Series, marker: str) -> np.ndarray:
+    categories = values.cat.categories
+    if marker not in categories:
+        return np.zeros(len(values), dtype=bool)
+    return values.cat.codes.to_numpy() == categories.get_loc(marker)
+
+
 def build_intervals(
     events: pd.DataFrame,
     entry_marker: str,
     exit_marker: str,
-) -> Tuple[pd.DataFrame, List[Dict[str, str]]]:
-    intervals: List[Dict[str, object]] = []
-    issues: List[Dict[str, str]] = []
-
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
     if events.empty:
-        return pd.DataFrame(columns=["plate", "entry_time", "exit_time", "duration_minutes"]), issues
-
-    for plate, group in events.groupby("plate"):
-        group = group.sort_values("timestamp")
-        if plate.isdigit():
-            for _, hazard_row in group.iterrows():
-                issues.append(
-                    {
-                        "plate": plate,
-                        "issue": "Hazard plate number",
-                        "timestamp": hazard_row["timestamp"].isoformat(),
-                    }
-                )
-            continue
-        open_entry: Optional[pd.Timestamp] = None
-        for _, row in group.iterrows():
-            event = row["event"]
-            timestamp = row["timestamp"]
-            if event == entry_marker:
-                if open_entry is not None:
-                    issues.append(
-                        {
-                            "plate": plate,
-                            "issue": "Consecutive ENTRY without EXIT",
-                            "timestamp": open_entry.isoformat(),
-                        }
-                    )
-                open_entry = timestamp
-            elif event == exit_marker:
-                if open_entry is None:
-                    issues.append(
-                        {
-                            "plate": plate,
-                            "issue": "EXIT without matching ENTRY",
-                            "timestamp": timestamp.isoformat(),
-                        }
-                    )
-                    continue
-                duration = (timestamp - open_entry).total_seconds() / 60.0
-                if duration < 0:
-                    issues.append(
-                        {
-                            "plate": plate,
-                            "issue": "EXIT earlier than ENTRY",
-                            "timestamp": timestamp.isoformat(),
-                        }
-                    )
-                    open_entry = None
-                    continue
-                intervals.append(
-                    {
-                        "plate": plate,
-                        "entry_time": open_entry,
-                        "exit_time": timestamp,
-                        "duration_minutes": round(duration, 2),
-                    }
-                )
-                open_entry = None
-        if open_entry is not None:
-            issues.append(
-                {
-                    "plate": plate,
-                    "issue": "ENTRY without matching EXIT",
-                    "timestamp": open_entry.isoformat(),
-                }
-            )
+        return (
+            pd.DataFrame(columns=["plate", "entry_time", "exit_time", "duration_minutes"]),
+            pd.DataFrame(columns=["plate", "issue", "timestamp"]),
+        )
 
-    intervals_df = pd.DataFrame(intervals)
-    return intervals_df, issues
+    ordered = events.sort_values(["plate", "timestamp"], kind="stable")
+    plate_values = ordered["plate"].astype("category")
+    plate_codes = plate_values.cat.codes.to_numpy()
+    plates = ordered["plate"].to_numpy(dtype=object)
+    timestamps = pd.DatetimeIndex(ordered["timestamp"])
+    # Check each distinct plate once; purely numeric plates are flagged as hazards.
+    hazard_plates = np.array(
+        [str(plate).isdigit() for plate in plate_values.cat.categories], dtype=bool
+    )
+    hazard = hazard_plates[plate_codes]
+    event_values = ordered["event"].astype("category")
+    is_entry = _category_mask(event_values, entry_marker) & ~hazard
+    is_exit = _category_mask(event_values, exit_marker) & ~hazard
+
+    # Other event types never change the pairing state, and every ENTRY opens
+    # while every EXIT closes, so each marker row only depends on the previous
+    # marker row of the same plate.
+    marker_pos = np.flatnonzero(is_entry | is_exit)
+    marker_block = plate_codes[marker_pos]
+    marker_entry = is_entry[marker_pos]
+    same_as_prev = np.zeros(len(marker_pos), dtype=bool)
+    same_as_prev[1:] = marker_block[1:] == marker_block[:-1]
+    last_of_plate = np.ones(len(marker_pos), dtype=bool)
+    last_of_plate[:-1] = ~same_as_prev[1:]
+    after_entry = np.zeros(len(marker_pos), dtype=bool)
+    after_entry[1:] = same_as_prev[1:] & marker_entry[:-1]
+
+    consecutive = np.flatnonzero(marker_entry & after_entry)
+    closing = np.flatnonzero(~marker_entry & after_entry)
+    paired_entry = marker_pos[closing - 1]
+    paired_exit = marker_pos[closing]
+    # Work on int64 nanoseconds; the explicit cast matters because pandas may
+    # store timestamps at a coarser resolution than ns.
+    timestamps_ns = timestamps.to_numpy(dtype="datetime64[ns]").view("i8")
+    durations = (timestamps_ns[paired_exit] - timestamps_ns[paired_entry]).astype(np.float64) / 60e9
+    backwards = durations < 0
+
+    hazard_pos = np.flatnonzero(hazard)
+    orphan_exit_pos = marker_pos[~marker_entry & ~after_entry]
+    open_entry_pos = marker_pos[marker_entry & last_of_plate]
+    # (row where the issue is raised, row whose timestamp is reported, issue)
+    issue_parts = [
+        (hazard_pos, hazard_pos, "Hazard plate number"),
+        (marker_pos[consecutive], marker_pos[consecutive - 1], "Consecutive ENTRY without EXIT"),
+        (orphan_exit_pos, orphan_exit_pos, "EXIT without matching ENTRY"),
+        (paired_exit[backwards], paired_exit[backwards], "EXIT earlier than ENTRY"),
+        (open_entry_pos, open_entry_pos, "ENTRY without matching EXIT"),
+    ]
+    raised_at = np.concatenate([part[0] for part in issue_parts])
+    reported = np.concatenate([part[1] for part in issue_parts])
+    labels = np.concatenate([np.full(len(part[0]), part[2], dtype=object) for part in issue_parts])
+    order = np.argsort(raised_at, kind="stable")
+    issue_rows = reported[order]
+    issues_df = pd.DataFrame(
+        {
+            "plate": plates[issue_rows],
+            "issue": labels[order],
+            "timestamp": timestamps[issue_rows],
+        }
+    )
+
+    kept = ~backwards
+    intervals_df = pd.DataFrame(
+        {
+            "plate": plates[paired_exit[kept]],
+            "entry_time": timestamps[paired_entry[kept]],
+            "exit_time": timestamps[paired_exit[kept]],
+            "duration_minutes": np.round(durations[kept], 2),
+        }
+    )
+    return intervals_df, issues_df
 
 
 def summarize_monthly(intervals: pd.DataFrame) -> pd.DataFrame:
@@ -256,13 +538,29 @@ def summarize_monthly(intervals: pd.DataFrame) -> pd.DataFrame:
         return pd.DataFrame(
             columns=["plate", "month", "visits", "total_minutes", "total_hours"]
         )
-    monthly = intervals.copy()
-    monthly["month"] = monthly["entry_time"].dt.to_period("M").astype(str)
-    agg = (
-        monthly.groupby(["plate", "month"])["duration_minutes"]
-        .agg(["count", "sum"])
-        .rename(columns={"count": "visits", "sum": "total_minutes"})
-        .reset_index()
+    # Each (plate, month) group must be a contiguous run of rows.
+    # build_intervals already emits visits ordered by plate and entry time, so
+    # only sort when a linear check finds other input out of order.
+    plate_codes, _ = pd.factorize(intervals["plate"], sort=True)
+    entry_ns = intervals["entry_time"].to_numpy(dtype="datetime64[ns]").view("i8")
+    plate_step = np.diff(plate_codes)
+    if ((plate_step < 0) | ((plate_step == 0) & (np.diff(entry_ns) < 0))).any():
+        order = np.lexsort((entry_ns, plate_codes))
+        intervals = intervals.iloc[order]
+        plate_codes = plate_codes[order]
+    # Months are kept as integer months-since-epoch and only the grouped rows
+    # are formatted as YYYY-MM.
+    plates = intervals["plate"].to_numpy(dtype=object)
+    months = intervals["entry_time"].to_numpy(dtype="datetime64[M]")
+    durations = intervals["duration_minutes"].to_numpy(dtype=np.float64)
+    starts = _run_starts(plate_codes, months.view("i8"))
+    agg = pd.DataFrame(
+        {
+            "plate": plates[starts],
+            "month": np.datetime_as_string(months[starts], unit="M"),
+            "visits": np.diff(np.append(starts, len(intervals))),
+            "total_minutes": np.add.reduceat(durations, starts),
+        }
     )
     agg["total_hours"] = (agg["total_minutes"] / 60.0).round(2)
     agg["total_minutes"] = agg["total_minutes"].round(2)
@@ -273,36 +571,53 @@ def write_output(
     output_file: Path,
     intervals: pd.DataFrame,
     monthly: pd.DataFrame,
-    issues: List[Dict[str, str]],
+    issues: pd.DataFrame,
 ) -> None:
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    with pd.ExcelWriter(output_file) as writer:
+    with pd.ExcelWriter(output_file, engine="xlsxwriter") as writer:
         monthly.to_excel(writer, sheet_name="monthly_totals", index=False)
         _autosize_sheet(writer, "monthly_totals", monthly)
 
         intervals.to_excel(writer, sheet_name="intervals", index=False)
         _autosize_sheet(writer, "intervals", intervals)
 
-        if issues:
-            issues_df = pd.DataFrame(issues)
+        if not issues.empty:
+            issues_df = issues.assign(timestamp=_isoformat(issues["timestamp"]))
             issues_df.to_excel(writer, sheet_name="issues", index=False)
             _autosize_sheet(writer, "issues", issues_df)
     print(f"Saved aggregated results to {output_file}")
 
 
+def _isoformat(values: pd.Series) -> pd.Series:
+    # Same text as Timestamp.isoformat(), formatted column-wise; fractional
+    # seconds are only appended where present.
+    timestamps = pd.to_datetime(values)
+    text = timestamps.dt.strftime("%Y-%m-%dT%H:%M:%S")
+    has_fraction = timestamps.dt.microsecond != 0
+    if has_fraction.any():
+        text = text.where(~has_fraction, text + timestamps.dt.strftime(".%f"))
+    return text
+
+
 def _autosize_sheet(writer: pd.ExcelWriter, sheet_name: str, dataframe: pd.DataFrame) -> None:
     worksheet = writer.sheets[sheet_name]
     if dataframe.empty and not list(dataframe.columns):
         return
-    for idx, column in enumerate(dataframe.columns, start=1):
+    for idx, column in enumerate(dataframe.columns):
         header_length = len(str(column))
         if dataframe.empty:
             max_length = header_length
         else:
-            series = dataframe[column].astype(str)
-            cell_lengths = series.map(len).tolist()
-            max_length = max([header_length] + cell_lengths)
-        worksheet.column_dimensions[get_column_letter(idx)].width = min(max_length + 2, 60)
+            max_length = max(header_length, _max_text_length(dataframe[column]))
+        worksheet.set_column(idx, idx, min(max_length + 2, 60))
+
+
+def _max_text_length(series: pd.Series) -> int:
+    # Column widths settle quickly, so long sheets only sample their ends.
+    if len(series) > 2 * AUTOSIZE_SAMPLE_ROWS:
+        series = pd.concat([series.head(AUTOSIZE_SAMPLE_ROWS), series.tail(AUTOSIZE_SAMPLE_ROWS)])
+    lengths = series.astype("string").str.len()
+    return int(lengths.max()) if lengths.notna().any() else 0
 
 
 def main() -> None:
@@ -320,7 +635,12 @@ def main() -> None:
         )
         sys.exit(1)
 
-    events = load_events(excel_files, app_config.columns, app_config.timestamp_format)
+    events = load_events(
+        excel_files,
+        app_config.columns,
+        app_config.timestamp_format,
+        app_config.cache_folder,
+    )
     if events.empty:
         print("No valid events could be read from the Excel files.", file=sys.stderr)
         sys.exit(1)
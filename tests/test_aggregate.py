@@ -0,0 +1,451 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+from openpyxl import Workbook
+
+import aggregate
+from aggregate import (
+    ColumnMapping,
+    _cache_file,
+    _infer_timestamp_format,
+    _isoformat,
+    _parse_timestamps,
+    build_intervals,
+    discover_excel_files,
+    load_events,
+    summarize_monthly,
+)
+
+ENTRY = "01 ENTRY"
+EXIT = "02 EXIT"
+
+
+def _events(rows):
+    events = pd.DataFrame(rows, columns=["plate", "event", "timestamp"])
+    events["timestamp"] = pd.to_datetime(events["timestamp"])
+    return events
+
+
+def _issues(issues):
+    return [
+        (row.plate, row.issue, row.timestamp.strftime("%Y-%m-%d %H:%M"))
+        for row in issues.itertuples()
+    ]
+
+
+def test_pairs_entry_with_next_exit():
+    intervals, issues = build_intervals(
+        _events(
+            [
+                ("AB1", EXIT, "2024-01-01 10:30"),
+                ("AB1", ENTRY, "2024-01-01 10:00"),
+            ]
+        ),
+        ENTRY,
+        EXIT,
+    )
+
+    assert issues.empty
+    assert intervals["plate"].tolist() == ["AB1"]
+    assert intervals["entry_time"].tolist() == [pd.Timestamp("2024-01-01 10:00")]
+    assert intervals["exit_time"].tolist() == [pd.Timestamp("2024-01-01 10:30")]
+    assert intervals["duration_minutes"].tolist() == [30.0]
+
+
+def test_consecutive_entry_reports_the_earlier_entry():
+    intervals, issues = build_intervals(
+        _events(
+            [
+                ("AB1", ENTRY, "2024-01-01 08:00"),
+                ("AB1", ENTRY, "2024-01-01 09:00"),
+                ("AB1", EXIT, "2024-01-01 09:15"),
+            ]
+        ),
+        ENTRY,
+        EXIT,
+    )
+
+    assert _issues(issues) == [("AB1", "Consecutive ENTRY without EXIT", "2024-01-01 08:00")]
+    assert intervals["entry_time"].tolist() == [pd.Timestamp("2024-01-01 09:00")]
+    assert intervals["duration_minutes"].tolist() == [15.0]
+
+
+def test_orphan_exit_and_trailing_entry():
+    intervals, issues = build_intervals(
+        _events(
+            [
+                ("AB1", EXIT, "2024-01-01 08:00"),
+                ("AB1", ENTRY, "2024-01-01 09:00"),
+                ("AB1", EXIT, "2024-01-01 10:00"),
+                ("AB1", EXIT, "2024-01-01 11:00"),
+                ("AB1", ENTRY, "2024-01-01 12:00"),
+            ]
+        ),
+        ENTRY,
+        EXIT,
+    )
+
+    assert _issues(issues) == [
+        ("AB1", "EXIT without matching ENTRY", "2024-01-01 08:00"),
+        ("AB1", "EXIT without matching ENTRY", "2024-01-01 11:00"),
+        ("AB1", "ENTRY without matching EXIT", "2024-01-01 12:00"),
+    ]
+    assert intervals["duration_minutes"].tolist() == [60.0]
+
+
+def test_exit_timestamped_before_entry_is_never_paired():
+    # Events are ordered by time first, so an EXIT earlier than its ENTRY
+    # becomes an orphan EXIT followed by an open ENTRY.
+    intervals, issues = build_intervals(
+        _events(
+            [
+                ("AB1", ENTRY, "2024-01-01 10:00"),
+                ("AB1", EXIT, "2024-01-01 09:00"),
+            ]
+        ),
+        ENTRY,
+        EXIT,
+    )
+
+    assert intervals.empty
+    assert _issues(issues) == [
+        ("AB1", "EXIT without matching ENTRY", "2024-01-01 09:00"),
+        ("AB1", "ENTRY without matching EXIT", "2024-01-01 10:00"),
+    ]
+
+
+def test_hazard_plates_report_every_event_and_are_not_paired():
+    intervals, issues = build_intervals(
+        _events(
+            [
+                ("12345", ENTRY, "2024-01-01 08:00"),
+                ("12345", "03 OTHER", "2024-01-01 08:30"),
+                ("12345", EXIT, "2024-01-01 09:00"),
+            ]
+        ),
+        ENTRY,
+        EXIT,
+    )
+
+    assert intervals.empty
+    assert _issues(issues) == [
+        ("12345", "Hazard plate number", "2024-01-01 08:00"),
+        ("12345", "Hazard plate number", "2024-01-01 08:30"),
+        ("12345", "Hazard plate number", "2024-01-01 09:00"),
+    ]
+
+
+def test_other_events_do_not_affect_pairing():
+    intervals, issues = build_intervals(
+        _events(
+            [
+                ("AB1", ENTRY, "2024-01-01 08:00"),
+                ("AB1", "03 OTHER", "2024-01-01 08:10"),
+                ("AB1", "03 OTHER", "2024-01-01 08:20"),
+                ("AB1", EXIT, "2024-01-01 08:30"),
+                ("AB1", "03 OTHER", "2024-01-01 08:40"),
+            ]
+        ),
+        ENTRY,
+        EXIT,
+    )
+
+    assert issues.empty
+    assert intervals["duration_minutes"].tolist() == [30.0]
+
+
+def test_issues_are_ordered_by_plate_then_by_raising_event():
+    _, issues = build_intervals(
+        _events(
+            [
+                ("ZZ9", EXIT, "2024-01-01 07:00"),
+                ("AB1", ENTRY, "2024-01-01 09:00"),
+                ("AB1", ENTRY, "2024-01-01 10:00"),
+                ("777", ENTRY, "2024-01-01 06:00"),
+                ("AB1", EXIT, "2024-01-01 08:00"),
+            ]
+        ),
+        ENTRY,
+        EXIT,
+    )
+
+    assert _issues(issues) == [
+        ("777", "Hazard plate number", "2024-01-01 06:00"),
+        ("AB1", "EXIT without matching ENTRY", "2024-01-01 08:00"),
+        ("AB1", "Consecutive ENTRY without EXIT", "2024-01-01 09:00"),
+        ("AB1", "ENTRY without matching EXIT", "2024-01-01 10:00"),
+        ("ZZ9", "EXIT without matching ENTRY", "2024-01-01 07:00"),
+    ]
+
+
+def test_accepts_categorical_columns():
+    events = _events(
+        [
+            ("AB1", ENTRY, "2024-01-01 08:00"),
+            ("AB1", EXIT, "2024-01-01 08:45"),
+        ]
+    )
+    events["plate"] = events["plate"].astype("category")
+    events["event"] = events["event"].astype("category")
+
+    intervals, issues = build_intervals(events, ENTRY, EXIT)
+
+    assert issues.empty
+    assert intervals["duration_minutes"].tolist() == [45.0]
+
+
+def test_empty_events():
+    intervals, issues = build_intervals(_events([]), ENTRY, EXIT)
+
+    assert intervals.empty
+    assert issues.empty
+    assert list(issues.columns) == ["plate", "issue", "timestamp"]
+
+
+def test_summarize_monthly_groups_by_plate_and_entry_month():
+    intervals, _ = build_intervals(
+        _events(
+            [
+                ("AB1", ENTRY, "2024-01-31 23:00"),
+                ("AB1", EXIT, "2024-02-01 01:00"),
+                ("AB1", ENTRY, "2024-02-02 10:00"),
+                ("AB1", EXIT, "2024-02-02 10:30"),
+                ("AA0", ENTRY, "2024-02-03 10:00"),
+                ("AA0", EXIT, "2024-02-03 11:00"),
+            ]
+        ),
+        ENTRY,
+        EXIT,
+    )
+
+    monthly = summarize_monthly(intervals)
+
+    assert monthly.to_dict("records") == [
+        {"plate": "AA0", "month": "2024-02", "visits": 1, "total_minutes": 60.0, "total_hours": 1.0},
+        {"plate": "AB1", "month": "2024-01", "visits": 1, "total_minutes": 120.0, "total_hours": 2.0},
+        {"plate": "AB1", "month": "2024-02", "visits": 1, "total_minutes": 30.0, "total_hours": 0.5},
+    ]
+
+
+def test_summarize_monthly_handles_unordered_intervals():
+    intervals = pd.DataFrame(
+        {
+            "plate": ["B2", "A1", "B2", "A1"],
+            "entry_time": pd.to_datetime(
+                ["2024-02-01", "2024-01-05", "2024-01-01", "2024-01-02"]
+            ),
+            "exit_time": pd.to_datetime(
+                ["2024-02-01", "2024-01-05", "2024-01-01", "2024-01-02"]
+            ),
+            "duration_minutes": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+
+    monthly = summarize_monthly(intervals)
+
+    assert monthly[["plate", "month", "visits", "total_minutes"]].to_dict("records") == [
+        {"plate": "A1", "month": "2024-01", "visits": 2, "total_minutes": 6.0},
+        {"plate": "B2", "month": "2024-01", "visits": 1, "total_minutes": 3.0},
+        {"plate": "B2", "month": "2024-02", "visits": 1, "total_minutes": 1.0},
+    ]
+
+
+def test_infer_timestamp_format_uses_every_sampled_value():
+    raw = pd.Series(["01/02/2024 10:00", "01/13/2024 10:00", "02/03/2024 11:00"], dtype=object)
+
+    timestamp_format = _infer_timestamp_format(raw)
+
+    assert timestamp_format == "%m/%d/%Y %H:%M"
+    assert _parse_timestamps(raw, timestamp_format).tolist() == [
+        pd.Timestamp("2024-01-02 10:00"),
+        pd.Timestamp("2024-01-13 10:00"),
+        pd.Timestamp("2024-02-03 11:00"),
+    ]
+
+
+def test_infer_timestamp_format_leaves_ambiguous_day_month_to_pandas():
+    raw = pd.Series(["01/02/2024 10:00", "02/03/2024 11:00"], dtype=object)
+
+    assert _infer_timestamp_format(raw) is None
+
+
+def test_infer_timestamp_format_detects_iso_text():
+    raw = pd.Series([None, " ", "2024-01-01 08:00:00", "2024-01-01 08:00:00"], dtype=object)
+
+    assert _infer_timestamp_format(raw) == "%Y-%m-%d %H:%M:%S"
+
+
+def test_infer_timestamp_format_skips_datetime_columns():
+    raw = pd.Series(pd.date_range("2024-01-01", periods=3, freq="h"))
+
+    assert _infer_timestamp_format(raw) is None
+
+
+COLUMNS = ColumnMapping(plate="Plate", event="Event", timestamp="Timestamp")
+
+
+def _write_sheet(path, rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Plate", "Event", "Timestamp"])
+    for row in rows:
+        sheet.append(list(row))
+    workbook.save(path)
+    return path
+
+
+def test_cache_round_trip_matches_cold_read_for_mixed_timestamps(tmp_path):
+    workbook = _write_sheet(
+        tmp_path / "mixed.xlsx",
+        [
+            ("AB1", ENTRY, datetime(2024, 1, 1, 8, 0)),
+            ("AB1", EXIT, "2024-01-01 09:30:00"),
+            ("AB2", ENTRY, "2024-02-01 09:30:00"),
+            ("AB2", EXIT, datetime(2024, 2, 1, 10, 0)),
+            ("AB3", EXIT, None),
+        ],
+    )
+    cache_folder = tmp_path / "cache"
+
+    cold = load_events([workbook], COLUMNS, None, cache_folder)
+    cache_file = _cache_file(cache_folder, workbook)
+    assert cache_file.exists()
+    assert pd.read_parquet(cache_file).attrs["source"]["columns"] == [
+        "Plate",
+        "Event",
+        "Timestamp",
+    ]
+
+    warm = load_events([workbook], COLUMNS, None, cache_folder)
+
+    pd.testing.assert_frame_equal(cold, warm)
+    assert len(warm) == 4
+
+
+def test_cache_is_refreshed_when_workbook_changes(tmp_path):
+    workbook = _write_sheet(tmp_path / "events.xlsx", [("AB1", ENTRY, "2024-01-01 08:00:00")])
+    cache_folder = tmp_path / "cache"
+    load_events([workbook], COLUMNS, None, cache_folder)
+
+    _write_sheet(
+        workbook,
+        [
+            ("AB1", ENTRY, "2024-01-01 08:00:00"),
+            ("AB1", EXIT, "2024-01-01 09:00:00"),
+        ],
+    )
+    stat = workbook.stat()
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    events = load_events([workbook], COLUMNS, None, cache_folder)
+
+    assert len(events) == 2
+    assert len(list(cache_folder.iterdir())) == 1
+
+
+def test_numeric_timestamp_cells_are_not_cached(tmp_path):
+    workbook = _write_sheet(
+        tmp_path / "numeric.xlsx",
+        [
+            ("AB1", ENTRY, "2024-01-01 08:00:00"),
+            ("AB1", EXIT, 45000.5),
+        ],
+    )
+    cache_folder = tmp_path / "cache"
+
+    cold = load_events([workbook], COLUMNS, None, cache_folder)
+
+    assert not _cache_file(cache_folder, workbook).exists()
+    pd.testing.assert_frame_equal(cold, load_events([workbook], COLUMNS, None, cache_folder))
+
+
+def test_cache_hits_are_read_without_worker_processes(tmp_path, monkeypatch):
+    workbooks = [
+        _write_sheet(tmp_path / f"events_{idx}.xlsx", [("AB1", ENTRY, "2024-01-01 08:00:00")])
+        for idx in range(3)
+    ]
+    cache_folder = tmp_path / "cache"
+    for workbook in workbooks:
+        load_events([workbook], COLUMNS, None, cache_folder)
+
+    def _no_pool(*args, **kwargs):
+        raise AssertionError("cache hits must not start a process pool")
+
+    monkeypatch.setattr(aggregate, "ProcessPoolExecutor", _no_pool)
+
+    assert len(load_events(workbooks, COLUMNS, None, cache_folder)) == 3
+
+
+def _touch(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"")
+    return path
+
+
+def test_discover_excel_files_filters_names(tmp_path):
+    for name in ["b.xlsx", "A.XLS", "c.xlsm", "d.xlsb", "~$b.xlsx", "notes.txt", "e.xlsx.bak"]:
+        _touch(tmp_path / name)
+    (tmp_path / "folder.xlsx").mkdir()
+
+    files = discover_excel_files(tmp_path, recursive=False)
+
+    assert [path.name for path in files] == ["A.XLS", "b.xlsx", "c.xlsm", "d.xlsb"]
+
+
+def test_discover_excel_files_recurses_only_when_asked(tmp_path):
+    _touch(tmp_path / "top.xlsx")
+    _touch(tmp_path / "sub" / "deep" / "nested.xls")
+    _touch(tmp_path / "dir.xlsx" / "inside.xlsx")
+
+    assert discover_excel_files(tmp_path, recursive=False) == [tmp_path / "top.xlsx"]
+    assert discover_excel_files(tmp_path, recursive=True) == [
+        tmp_path / "dir.xlsx" / "inside.xlsx",
+        tmp_path / "sub" / "deep" / "nested.xls",
+        tmp_path / "top.xlsx",
+    ]
+
+
+def test_discover_excel_files_does_not_follow_directory_symlinks(tmp_path):
+    source = tmp_path / "source"
+    _touch(source / "events.xlsx")
+    (source / "loop").symlink_to(source, target_is_directory=True)
+
+    assert discover_excel_files(source, recursive=True) == [source / "events.xlsx"]
+
+
+def test_discover_excel_files_missing_folder(tmp_path):
+    assert discover_excel_files(tmp_path / "missing", recursive=True) == []
+    assert discover_excel_files(_touch(tmp_path / "file.xlsx"), recursive=False) == []
+
+
+def test_discover_excel_files_skips_unreadable_folders(tmp_path, monkeypatch):
+    _touch(tmp_path / "top.xlsx")
+    _touch(tmp_path / "locked" / "hidden.xlsx")
+    scandir = os.scandir
+
+    def _scandir(path):
+        if os.path.basename(path) == "locked":
+            raise PermissionError(13, "Permission denied", path)
+        return scandir(path)
+
+    monkeypatch.setattr(aggregate.os, "scandir", _scandir)
+
+    assert discover_excel_files(tmp_path, recursive=True) == [tmp_path / "top.xlsx"]
+
+
+def test_isoformat_matches_timestamp_isoformat():
+    values = pd.Series(
+        pd.to_datetime(
+            ["2024-01-01 10:00:00", "2024-01-01 10:00:00.500000", "2024-12-31 23:59:59.000123"],
+            format="ISO8601",
+        )
+    )
+
+    assert _isoformat(values).tolist() == [value.isoformat() for value in values]
+
+
+def test_isoformat_without_fractional_seconds():
+    values = pd.Series(pd.to_datetime(["2024-03-01 08:15:00", "2024-03-02 09:00:05"]))
+
+    assert _isoformat(values).tolist() == ["2024-03-01T08:15:00", "2024-03-02T09:00:05"]